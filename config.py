@@ -4,3 +4,6 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess-octopus-key'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///octopus.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Raise on unexpected lazy loads in the dashboard/timeline queries (set to 0 to disable)
+    SQLALCHEMY_RAISELOAD = os.environ.get('SQLALCHEMY_RAISELOAD', '1') != '0'
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'SimpleCache'
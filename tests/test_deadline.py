@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.deadline import calculate_time_remaining, is_approaching
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.mark.parametrize('offset, expected', [
+    (timedelta(0), False),
+    (timedelta(days=3), True),
+    (timedelta(days=3, hours=23), False),
+    (timedelta(days=4), False),
+    (timedelta(microseconds=-500000), False),
+])
+def test_is_approaching_window(offset, expected):
+    assert is_approaching(NOW + offset, now=NOW) is expected
+
+
+@pytest.mark.parametrize('offset, is_overdue, approaching', [
+    (timedelta(0), False, True),
+    (timedelta(days=3), False, True),
+    (timedelta(days=3, hours=23), False, True),
+    (timedelta(days=4), False, False),
+    (timedelta(microseconds=-500000), True, False),
+])
+def test_calculate_time_remaining_flags(offset, is_overdue, approaching):
+    remaining = calculate_time_remaining(NOW + offset, now=NOW)
+    assert remaining['is_overdue'] is is_overdue
+    assert remaining['is_approaching'] is approaching
+
+
+@pytest.mark.parametrize('offset, days, hours', [
+    (timedelta(0), 0, 0),
+    (timedelta(hours=23, minutes=59, seconds=59), 0, 23),
+    (timedelta(days=2, hours=5, minutes=59), 2, 5),
+    (timedelta(days=3, hours=23), 3, 23),
+    (timedelta(microseconds=-500000), 0, 0),
+    (-timedelta(days=2, hours=5), -2, 5),
+])
+def test_calculate_time_remaining_days_hours(offset, days, hours):
+    remaining = calculate_time_remaining(NOW + offset, now=NOW)
+    assert (remaining['days'], remaining['hours']) == (days, hours)
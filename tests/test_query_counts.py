@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import event
+
+from config import Config
+from web import create_app, db
+from web.models import Category, Project, Goal
+
+
+class QueryCountConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_RAISELOAD = True
+    TESTING = True
+
+
+class NoRaiseloadConfig(QueryCountConfig):
+    SQLALCHEMY_RAISELOAD = False
+
+
+@pytest.fixture(params=[QueryCountConfig, NoRaiseloadConfig], ids=['raiseload', 'no-raiseload'])
+def app(request):
+    app = create_app(request.param)
+    with app.app_context():
+        category = Category(name='Work', color='blue')
+        for i in range(20):
+            project = Project(title=f'Project {i}', category=category, order_index=i)
+            project.goals = [Goal(title=f'Goal {i}.{j}', status='Completed' if j % 2 else 'Pending')
+                             for j in range(3)]
+            db.session.add(project)
+        db.session.commit()
+    return app
+
+
+@pytest.fixture
+def query_count(app):
+    """Count SQL statements executed against the app's engine."""
+    counter = {'n': 0}
+
+    def count(*args):
+        counter['n'] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    yield counter
+    event.remove(engine, 'before_cursor_execute', count)
+
+
+@pytest.mark.parametrize('url', [
+    '/',
+    '/api/timeline/dashboard',
+    '/api/timeline/project/1',
+    '/api/timeline/filter',
+])
+def test_no_n_plus_one(app, query_count, url):
+    response = app.test_client().get(url)
+    assert response.status_code == 200
+    assert query_count['n'] <= 3
+
@@ -1,14 +1,32 @@
 """
 Deadline calculation utilities for projects and goals.
 """
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
+SECONDS_PER_DAY = 86400
 
-def calculate_time_remaining(deadline: datetime) -> Dict:
+
+@lru_cache(maxsize=2048)
+def _format_date(value: datetime, fmt: str) -> str:
+    """Format a datetime, memoized since the same deadlines render repeatedly."""
+    return value.strftime(fmt)
+
+
+def _status_bits(delta_seconds: float, threshold_seconds: float) -> Tuple[bool, bool]:
+    """Return (is_overdue, is_approaching) for the seconds left until a deadline."""
+    if delta_seconds < 0:
+        return True, False
+    return False, delta_seconds < threshold_seconds
+
+
+def calculate_time_remaining(deadline: datetime, now: Optional[datetime] = None) -> Dict:
     """
     Calculate time remaining until deadline.
     
+    If now is not provided, the current UTC time is used.
+    
     Returns:
         dict with keys:
         - days: int (negative if overdue)
@@ -19,29 +37,37 @@ def calculate_time_remaining(deadline: datetime) -> Dict:
     if deadline is None:
         return None
     
-    now = datetime.utcnow()
-    delta = deadline - now
+    if now is None:
+        now = datetime.utcnow()
+    total_seconds = (deadline - now).total_seconds()
     
-    total_seconds = delta.total_seconds()
-    is_overdue = total_seconds < 0
+    # Approaching while at most 3 whole days remain (delta.days <= 3)
+    is_overdue, is_approaching = _status_bits(total_seconds, 4 * SECONDS_PER_DAY)
     
     # Convert to absolute values for display
-    abs_delta = abs(delta)
-    days = abs_delta.days
-    hours = abs_delta.seconds // 3600
+    abs_seconds = int(abs(total_seconds))
+    days, remainder = divmod(abs_seconds, SECONDS_PER_DAY)
+    hours = remainder // 3600
     
     return {
         'days': days if not is_overdue else -days,
         'hours': hours,
         'is_overdue': is_overdue,
-        'is_approaching': not is_overdue and delta.days <= 3
+        'is_approaching': is_approaching
     }
 
 
-def format_time_remaining(deadline: datetime) -> str:
+def format_time_remaining(
+    deadline: datetime,
+    now: Optional[datetime] = None,
+    remaining: Optional[Dict] = None
+) -> str:
     """
     Format time remaining as human-readable string.
     
+    Accepts a precomputed result of calculate_time_remaining() as remaining
+    to avoid repeating the calculation.
+    
     Examples:
         "Due in 5 days"
         "Due in 2 hours"
@@ -51,7 +77,8 @@ def format_time_remaining(deadline: datetime) -> str:
     if deadline is None:
         return None
     
-    remaining = calculate_time_remaining(deadline)
+    if remaining is None:
+        remaining = calculate_time_remaining(deadline, now)
     
     if remaining['is_overdue']:
         days = abs(remaining['days'])
@@ -84,28 +111,35 @@ def format_time_remaining(deadline: datetime) -> str:
             return f"Due in {days} days"
 
 
-def is_overdue(deadline: datetime) -> bool:
+def is_overdue(deadline: datetime, now: Optional[datetime] = None) -> bool:
     """Check if deadline has passed."""
     if deadline is None:
         return False
-    return datetime.utcnow() > deadline
+    if now is None:
+        now = datetime.utcnow()
+    return now > deadline
 
 
-def is_approaching(deadline: datetime, days: int = 3) -> bool:
+def is_approaching(deadline: datetime, days: int = 3, now: Optional[datetime] = None) -> bool:
     """Check if deadline is within warning threshold."""
     if deadline is None:
         return False
     
-    now = datetime.utcnow()
-    threshold = now + timedelta(days=days)
+    if now is None:
+        now = datetime.utcnow()
     
-    return now < deadline <= threshold
+    # Strictly in the future and no later than the threshold
+    delta_seconds = (deadline - now).total_seconds()
+    return 0 < delta_seconds <= days * SECONDS_PER_DAY
 
 
-def get_deadline_status(deadline: datetime) -> Optional[Dict]:
+def get_deadline_status(deadline: datetime, now: Optional[datetime] = None) -> Optional[Dict]:
     """
     Get comprehensive deadline status for template rendering.
     
+    Pass now to share a single clock reading across everything rendered
+    in one request.
+    
     Returns:
         dict with keys:
         - display: str (formatted time remaining)
@@ -119,8 +153,11 @@ def get_deadline_status(deadline: datetime) -> Optional[Dict]:
     if deadline is None:
         return None
     
-    remaining = calculate_time_remaining(deadline)
-    display = format_time_remaining(deadline)
+    if now is None:
+        now = datetime.utcnow()
+    
+    remaining = calculate_time_remaining(deadline, now)
+    display = format_time_remaining(deadline, remaining=remaining)
     
     # Determine CSS class
     if remaining['is_overdue']:
@@ -133,8 +170,8 @@ def get_deadline_status(deadline: datetime) -> Optional[Dict]:
     return {
         'display': display,
         'css_class': css_class,
-        'date_formatted': deadline.strftime('%b %d, %Y'),
-        'date_short': deadline.strftime('%y-%m-%d'),
+        'date_formatted': _format_date(deadline, '%b %d, %Y'),
+        'date_short': _format_date(deadline, '%y-%m-%d'),
         'is_overdue': remaining['is_overdue'],
         'is_approaching': remaining['is_approaching']
     }
@@ -1,67 +1,104 @@
+import sys
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import chain
 from typing import List, Dict, Tuple, Optional
 
+# Timeline item type tags, interned so filter comparisons hit the identity fast path
+PROJECT_TYPE = sys.intern('project')
+GOAL_TYPE = sys.intern('goal')
+ITEM_TYPES = {PROJECT_TYPE: PROJECT_TYPE, GOAL_TYPE: GOAL_TYPE}
 
+# Month abbreviations for date axis labels (matches strftime's %b in the C locale)
+MONTH_ABBR = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+# A slotted dataclass is cheap to build and orjson serializes it natively,
+# without an intermediate dict per item
+@dataclass(slots=True)
+class TimelineItem:
+    """A project or goal bar on the Gantt timeline."""
+    id: int
+    name: str
+    type: str
+    start_date: Optional[datetime]
+    end_date: Optional[datetime]
+    status: str
+    category_color: str
+    project_id: Optional[int]
+    duration_days: int
+    # Only set for projects
+    goal_count: Optional[int] = None
+    progress: Optional[int] = None
+
+
+@lru_cache(maxsize=4096)
 def parse_date(date_val: Optional[str]) -> Optional[datetime]:
     """
     Parse a date string (ISO format) and return a naive UTC datetime.
     Ensures compatibility with database-stored naive datetimes.
+    
+    Results are memoized per raw string, since timeline items and repeated
+    filter requests share a small set of date values.
     """
     if not date_val:
         return None
     try:
-        # If date has 'Z' suffix, treat as explicit UTC
-        if date_val.endswith('Z'):
-            dt = datetime.fromisoformat(date_val.replace('Z', '+00:00'))
-            return dt.astimezone(timezone.utc).replace(tzinfo=None)
-        
-        # Parse the date
+        # fromisoformat accepts the 'Z' suffix natively on Python 3.11+
         dt = datetime.fromisoformat(date_val)
-        
-        # If it has timezone info, convert to naive UTC
-        if dt.tzinfo is not None:
-            return dt.astimezone(timezone.utc).replace(tzinfo=None)
-        
-        # If already naive, assume it's already in UTC (database format)
-        return dt
     except (ValueError, TypeError):
         return None
+    
+    # If already naive, assume it's already in UTC (database format)
+    if dt.tzinfo is None:
+        return dt
+    
+    # If it has timezone info, convert to naive UTC
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _as_naive_utc(value) -> Optional[datetime]:
+    """Normalize a string or datetime to a naive UTC datetime for comparison."""
+    if type(value) is datetime and value.tzinfo is None:
+        return value
+    if isinstance(value, str):
+        return parse_date(value)
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 
-def get_timeline_items_for_dashboard(projects: List) -> List[Dict]:
+def get_timeline_items_for_dashboard(projects: List) -> List[TimelineItem]:
     """
     Return all projects and their goals as timeline items.
     
     Each item contains: id, name, type, start_date, end_date, status, 
     category_color, project_id, duration_days
     """
-    items = []
-    
-    for project in projects:
-        # Add project as timeline item
-        items.append(project.get_timeline_item())
-        
-        # Add all goals for this project
-        for goal in project.goals:
-            items.append(goal.get_timeline_item())
-    
-    return items
+    now = datetime.utcnow()
+    return list(chain.from_iterable(
+        get_timeline_items_for_project(project, now) for project in projects
+    ))
 
 
-def get_timeline_items_for_project(project) -> List[Dict]:
+def get_timeline_items_for_project(project, now: Optional[datetime] = None) -> List[TimelineItem]:
     """
     Return a project and its goals as timeline items.
     Includes the project itself as a reference bar.
     """
-    items = [project.get_timeline_item()]
-    
-    for goal in project.goals:
-        items.append(goal.get_timeline_item())
+    if now is None:
+        now = datetime.utcnow()
     
-    return items
+    # Goals share the project's color
+    project_item = project.get_timeline_item(now)
+    return [project_item] + [
+        goal.get_timeline_item(project_item.category_color, now) for goal in project.goals
+    ]
 
 
-def calculate_date_range(items: List[Dict], padding_days: int = 7, explicit_range: Optional[Tuple[datetime, datetime]] = None) -> Tuple[datetime, datetime]:
+def calculate_date_range(items: List[TimelineItem], padding_days: int = 7, explicit_range: Optional[Tuple[datetime, datetime]] = None) -> Tuple[datetime, datetime]:
     """
     Determine min/max dates for timeline view.
     If explicit_range is provided (min, max), it uses those as the bounds.
@@ -74,23 +111,12 @@ def calculate_date_range(items: List[Dict], padding_days: int = 7, explicit_rang
         now = datetime.utcnow()
         return (now - timedelta(days=30), now + timedelta(days=30))
     
-    min_date = None
-    max_date = None
+    starts = [s for s in (_as_naive_utc(i.start_date) for i in items) if s]
+    ends = [e for e in (_as_naive_utc(i.end_date) for i in items) if e]
     
-    for item in items:
-        start = parse_date(item.get('start_date')) if isinstance(item.get('start_date'), str) else item.get('start_date')
-        end = parse_date(item.get('end_date')) if isinstance(item.get('end_date'), str) else item.get('end_date')
-        
-        if start:
-            if min_date is None or start < min_date:
-                min_date = start
-        
-        if end:
-            if max_date is None or end > max_date:
-                max_date = end
-        elif start:  # Item without end date - use start as potential max
-            if max_date is None or start > max_date:
-                max_date = start
+    # Items without an end date still count their start as a potential max
+    min_date = min(starts, default=None)
+    max_date = max(chain(ends, starts), default=None)
     
     # Default to current date if no dates found
     now = datetime.utcnow()
@@ -107,18 +133,18 @@ def calculate_date_range(items: List[Dict], padding_days: int = 7, explicit_rang
 
 
 def filter_timeline_items(
-    items: List[Dict],
+    items: List[TimelineItem],
     date_start: Optional[datetime] = None,
     date_end: Optional[datetime] = None,
     status: Optional[List[str]] = None,
     project_id: Optional[int] = None,
     item_type: Optional[str] = None
-) -> List[Dict]:
+) -> List[TimelineItem]:
     """
     Filter timeline items by various criteria.
     
     Args:
-        items: List of timeline item dicts
+        items: List of timeline items
         date_start: Only include items ending after this date
         date_end: Only include items starting before this date
         status: List of statuses to include (e.g., ['Active', 'Completed'])
@@ -127,52 +153,51 @@ def filter_timeline_items(
     
     Returns filtered list of items.
     """
-    filtered = items
+    # Nothing to filter on, so skip walking the items entirely
+    if not (item_type or status or project_id is not None or date_start or date_end):
+        return items
     
+    # Map a known type onto the shared tag so equality short-circuits on
+    # identity; request input itself is never interned
     if item_type:
-        filtered = [i for i in filtered if i.get('type') == item_type]
+        item_type = ITEM_TYPES.get(item_type, item_type)
+    status_set = frozenset(status) if status else None
+    filtered = []
     
-    if status:
-        filtered = [i for i in filtered if i.get('status') in status]
-    
-    if project_id is not None:
+    # Single pass, cheapest predicates first so most rejected items never
+    # reach the date parsing below
+    for item in items:
+        if item_type and item.type != item_type:
+            continue
+        
+        if status_set is not None and item.status not in status_set:
+            continue
+        
         # Include the project itself and its goals
-        filtered = [i for i in filtered 
-                   if i.get('project_id') == project_id 
-                   or (i.get('type') == 'project' and i.get('id') == project_id)]
-    
-    if date_start:
+        if project_id is not None and not (
+            item.project_id == project_id
+            or (item.type == PROJECT_TYPE and item.id == project_id)
+        ):
+            continue
+        
         # Include items that end after date_start (or have no end date)
-        def ends_after(item):
-            end = item.get('end_date')
-            if end is None:
-                return True
-            if isinstance(end, str):
-                end = parse_date(end)
-            # If end is a datetime, ensure it's naive for comparison
-            if isinstance(end, datetime) and end.tzinfo is not None:
-                end = end.astimezone(timezone.utc).replace(tzinfo=None)
-            return end >= date_start
-        filtered = [i for i in filtered if ends_after(i)]
-    
-    if date_end:
+        if date_start:
+            end = _as_naive_utc(item.end_date)
+            if end is not None and end < date_start:
+                continue
+        
         # Include items that start before date_end
-        def starts_before(item):
-            start = item.get('start_date')
-            if start is None:
-                return True
-            if isinstance(start, str):
-                start = parse_date(start)
-            # If start is a datetime, ensure it's naive for comparison
-            if isinstance(start, datetime) and start.tzinfo is not None:
-                start = start.astimezone(timezone.utc).replace(tzinfo=None)
-            return start <= date_end
-        filtered = [i for i in filtered if starts_before(i)]
+        if date_end:
+            start = _as_naive_utc(item.start_date)
+            if start is not None and start > date_end:
+                continue
+        
+        filtered.append(item)
     
     return filtered
 
 
-def prepare_gantt_data(items: List[Dict], date_range: Tuple[datetime, datetime]) -> Dict:
+def prepare_gantt_data(items: List[TimelineItem], date_range: Tuple[datetime, datetime]) -> Dict:
     """
     Convert timeline items to full Gantt format with date axis.
     
@@ -198,29 +223,26 @@ def prepare_gantt_data(items: List[Dict], date_range: Tuple[datetime, datetime])
         step_days = 7
     else:
         zoom_level = "month"
-        step_days = 30
-    
-    # Generate date axis labels
-    date_axis = []
-    current = min_date
-    position = 0
-    
-    while current <= max_date:
-        if zoom_level == "day":
-            label = current.strftime("%b %d")
-        elif zoom_level == "week":
-            label = current.strftime("%b %d")
-        else:
-            label = current.strftime("%b %Y")
-        
-        date_axis.append({
-            "date": current.isoformat(),
+    
+    # Generate date axis ticks
+    if zoom_level == "month":
+        # Align ticks to calendar month starts so labels never repeat or skip
+        months = (max_date.year - min_date.year) * 12 + max_date.month - min_date.month + 1
+        first_month = min_date.year * 12 + min_date.month - 1
+        ticks = [datetime(m // 12, m % 12 + 1, 1) for m in range(first_month, first_month + months)]
+        labels = [f"{MONTH_ABBR[t.month - 1]} {t.year}" for t in ticks]
+    else:
+        ticks = [min_date + timedelta(days=offset) for offset in range(0, total_days + 1, step_days)]
+        labels = [f"{MONTH_ABBR[t.month - 1]} {t.day:02d}" for t in ticks]
+    
+    date_axis = [
+        {
+            "date": tick.isoformat(),
             "label": label,
             "position": position
-        })
-        
-        current += timedelta(days=step_days)
-        position += 1
+        }
+        for position, (tick, label) in enumerate(zip(ticks, labels))
+    ]
     
     return {
         "items": items,
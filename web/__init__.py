@@ -1,14 +1,120 @@
+import orjson
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from flask_caching import Cache
 from flask_sqlalchemy import SQLAlchemy
+from jinja2_htmlmin import minify_loader
+from sqlalchemy import DDL
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateColumn
 from config import Config
 
 db = SQLAlchemy()
+cache = Cache()
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Serialize JSON with orjson, which writes bytes directly and emits
+    datetimes as ISO 8601 strings rather than HTTP dates.
+
+    orjson has fixed formatting, so keyword arguments passed to dumps()
+    (sort_keys, indent, ...) are ignored.
+    """
+
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def response(self, *args, **kwargs):
+        # Same argument handling as flask.jsonify()
+        if args and kwargs:
+            raise TypeError('jsonify() takes either args or kwargs, not both')
+        if len(args) == 1:
+            obj = args[0]
+        else:
+            obj = args or kwargs or None
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option),
+            mimetype=self.mimetype
+        )
+
+
+# Nullable columns and indexes added since the first release, by table.
+# db.create_all() only creates missing tables, so existing databases get
+# these from add_missing_schema().
+ADDED_COLUMNS = {
+    'category': ('updated_at',),
+    'project': ('updated_at',),
+    'goal': ('updated_at',),
+}
+ADDED_INDEXES = {
+    'project': ('ix_project_order_cat',),
+    'goal': ('ix_goal_project_status',),
+}
+
+
+def _has_column(conn, table, name):
+    return name in {column['name'] for column in db.inspect(conn).get_columns(table.name)}
+
+
+def _has_index(conn, table, name):
+    return name in {index['name'] for index in db.inspect(conn).get_indexes(table.name)}
+
+
+def _apply_once(exists, create):
+    """
+    Run create(conn) in its own transaction unless exists(conn) already holds.
+    When several workers start at once, the loser of the race gets a
+    duplicate column/index error, which is fine as long as the object exists.
+    """
+    with db.engine.connect() as conn:
+        if exists(conn):
+            return
+        # End the transaction the inspection autobegan
+        conn.rollback()
+        try:
+            with conn.begin():
+                create(conn)
+        except DBAPIError:
+            if not exists(conn):
+                raise
+
+
+def add_missing_schema():
+    """Add the columns and indexes in ADDED_COLUMNS/ADDED_INDEXES to an existing database."""
+    for table_name, column_names in ADDED_COLUMNS.items():
+        table = db.metadata.tables[table_name]
+        for name in column_names:
+            # Identifiers are quoted by the dialect; the column spec is compiled from the model
+            column_spec = CreateColumn(table.c[name]).compile(dialect=db.engine.dialect)
+            add_column = DDL(f'ALTER TABLE %(fullname)s ADD COLUMN {column_spec}').against(table)
+            _apply_once(
+                lambda conn: _has_column(conn, table, name),
+                lambda conn: conn.execute(add_column)
+            )
+
+    for table_name, index_names in ADDED_INDEXES.items():
+        table = db.metadata.tables[table_name]
+        for index in table.indexes:
+            if index.name in index_names:
+                _apply_once(
+                    lambda conn: _has_index(conn, table, index.name),
+                    index.create
+                )
+
 
 def create_app(config_class=Config):
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     app.config.from_object(config_class)
 
+    # Minify templates once at load time to shrink the HTMX fragments sent on every update
+    app.jinja_loader = minify_loader(app.jinja_loader, remove_comments=True, reduce_boolean_attributes=True)
+
     db.init_app(app)
+    cache.init_app(app)
 
     from web import routes
     app.register_blueprint(routes.bp)
@@ -17,5 +123,6 @@ def create_app(config_class=Config):
         # Import models to ensure they are registered with SQLAlchemy
         from . import models
         db.create_all()
+        add_missing_schema()
 
     return app
@@ -1,11 +1,14 @@
 from . import db
 from datetime import datetime
+from sqlalchemy import event
+from utils.timeline import PROJECT_TYPE, GOAL_TYPE, TimelineItem
 
 class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
     # Color stores the css variable name suffix, e.g. 'blue', 'green'
     color = db.Column(db.String(20), default='blue', nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
     projects = db.relationship('Project', backref='category', lazy=True)
 
     def to_dict(self):
@@ -16,6 +19,10 @@ class Category(db.Model):
         }
 
 class Project(db.Model):
+    # Leads with order_index, so MAX(order_index) on create and the dashboard's
+    # ORDER BY avoid a table scan; also covers the columns it joins and filters on
+    __table_args__ = (db.Index('ix_project_order_cat', 'order_index', 'category_id', 'status'),)
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -31,16 +38,56 @@ class Project(db.Model):
     date_on_hold = db.Column(db.DateTime, nullable=True)
     date_abandoned = db.Column(db.DateTime, nullable=True)
     deadline = db.Column(db.DateTime, nullable=True)
+    # Bumped on every change; feeds the timeline ETag
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
 
-    # Relationship to Goals
+    # Relationship to Goals (queries that need them eager-load explicitly)
     goals = db.relationship('Goal', backref='project', lazy=True, cascade='all, delete-orphan')
 
+    # Memoized (completed, total) goal counts, cleared whenever the instance
+    # is expired or refreshed (e.g. on commit)
+    _goal_counts = None
+
+    def goal_counts(self):
+        """Return (completed, total) counts of this project's goals"""
+        if self._goal_counts is None:
+            completed = sum(1 for goal in self.goals if goal.status == 'Completed')
+            self._goal_counts = (completed, len(self.goals))
+        return self._goal_counts
+
+    @staticmethod
+    def count_goals(project_ids):
+        """
+        Return {project_id: (completed, total)} for the given project ids from
+        a single aggregate query. Projects without goals are left out.
+        """
+        rows = db.session.query(
+            Goal.project_id,
+            db.func.sum(db.case((Goal.status == 'Completed', 1), else_=0)),
+            db.func.count(Goal.id)
+        ).filter(Goal.project_id.in_(project_ids)).group_by(Goal.project_id)
+        return {project_id: (completed, total) for project_id, completed, total in rows}
+
+    @classmethod
+    def load_goal_counts(cls, projects):
+        """
+        Precompute goal_counts() for many projects with a single aggregate
+        query, so their goals never need to be loaded.
+        """
+        counts = cls.count_goals([p.id for p in projects])
+        for project in projects:
+            project._goal_counts = counts.get(project.id, (0, 0))
+
+    @staticmethod
+    def progress_percent(completed, total):
+        """Percentage of completed goals, 0 when there are none"""
+        if not total:
+            return 0
+        return int((completed / total) * 100)
+
     def calculate_progress(self):
         """Calculate progress based on completed goals"""
-        if not self.goals:
-            return 0
-        completed = sum(1 for goal in self.goals if goal.status == 'Completed')
-        return int((completed / len(self.goals)) * 100)
+        return self.progress_percent(*self.goal_counts())
 
     def to_dict(self):
         return {
@@ -58,40 +105,58 @@ class Project(db.Model):
             'deadline': self.deadline.isoformat() if self.deadline else None
         }
 
-    def get_duration_days(self):
+    def get_duration_days(self, now=None):
         """Calculate days between creation and completion (or now)."""
         if not self.date_created:
             return 0
-        end = self.date_completed or datetime.utcnow()
+        end = self.date_completed or now or datetime.utcnow()
         delta = end - self.date_created
         return delta.days
 
-    def get_timeline_item(self):
-        """Return timeline-compatible dict for Gantt visualization."""
+    def get_timeline_item(self, now=None):
+        """
+        Return a TimelineItem for Gantt visualization.
+        
+        Pass now to share one clock reading across all items in a request.
+        """
+        if now is None:
+            now = datetime.utcnow()
+        
         # Use date_completed if available, otherwise use current date for active projects
-        end_date = self.date_completed or datetime.utcnow()
+        end_date = self.date_completed or now
         
-        return {
-            'id': self.id,
-            'name': self.title,
-            'type': 'project',
-            'start_date': self.date_created.isoformat() if self.date_created else None,
-            'end_date': end_date.isoformat() if end_date else None,
-            'status': self.status,
-            'category_color': self.category.color if self.category else 'blue',
-            'project_id': None,
-            'goal_count': len(self.goals),
-            'progress': self.calculate_progress(),
-            'duration_days': self.get_duration_days()
-        }
-
-    def get_deadline_status(self):
+        return TimelineItem(
+            id=self.id,
+            name=self.title,
+            type=PROJECT_TYPE,
+            start_date=self.date_created,
+            end_date=end_date,
+            status=self.status,
+            category_color=self.category.color if self.category else 'blue',
+            project_id=None,
+            goal_count=len(self.goals),
+            progress=self.calculate_progress(),
+            duration_days=self.get_duration_days(now)
+        )
+
+    def get_deadline_status(self, now=None):
         """Return deadline status with display text and CSS class."""
         from utils.deadline import get_deadline_status
-        return get_deadline_status(self.deadline)
+        return get_deadline_status(self.deadline, now)
+
+
+@event.listens_for(Project, 'expire')
+@event.listens_for(Project, 'refresh')
+def _reset_goal_counts(target, *args):
+    # target is None when the instance was already garbage collected
+    if target is not None:
+        target._goal_counts = None
 
 
 class Goal(db.Model):
+    # Serves both the per-project goal lookups and ordering them by status
+    __table_args__ = (db.Index('ix_goal_project_status', 'project_id', 'status'),)
+
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
@@ -99,6 +164,7 @@ class Goal(db.Model):
     date_created = db.Column(db.DateTime, default=datetime.utcnow)
     date_completed = db.Column(db.DateTime, nullable=True)
     deadline = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
 
     def to_dict(self):
         return {
@@ -111,30 +177,39 @@ class Goal(db.Model):
             'deadline': self.deadline.isoformat() if self.deadline else None
         }
 
-    def get_duration_days(self):
+    def get_duration_days(self, now=None):
         """Calculate days between creation and completion (or now)."""
         if not self.date_created:
             return 0
-        end = self.date_completed or datetime.utcnow()
+        end = self.date_completed or now or datetime.utcnow()
         delta = end - self.date_created
         return delta.days
 
-    def get_timeline_item(self):
-        """Return timeline-compatible dict for Gantt visualization."""
-        return {
-            'id': self.id,
-            'name': self.title,
-            'type': 'goal',
-            'start_date': self.date_created.isoformat() if self.date_created else None,
-            'end_date': self.date_completed.isoformat() if self.date_completed else None,
-            'status': self.status,
-            'category_color': self.project.category.color if self.project and self.project.category else 'blue',
-            'project_id': self.project_id,
-            'duration_days': self.get_duration_days()
-        }
-
-    def get_deadline_status(self):
+    def get_timeline_item(self, category_color=None, now=None):
+        """
+        Return a TimelineItem for Gantt visualization.
+        
+        Callers iterating a project's goals can pass the project's
+        category_color to skip the goal -> project -> category lookup,
+        and now to share one clock reading across all items.
+        """
+        if category_color is None:
+            category_color = self.project.category.color if self.project and self.project.category else 'blue'
+        
+        return TimelineItem(
+            id=self.id,
+            name=self.title,
+            type=GOAL_TYPE,
+            start_date=self.date_created,
+            end_date=self.date_completed,
+            status=self.status,
+            category_color=category_color,
+            project_id=self.project_id,
+            duration_days=self.get_duration_days(now)
+        )
+
+    def get_deadline_status(self, now=None):
         """Return deadline status with display text and CSS class."""
         from utils.deadline import get_deadline_status
-        return get_deadline_status(self.deadline)
+        return get_deadline_status(self.deadline, now)
 
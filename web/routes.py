@@ -1,19 +1,121 @@
-from flask import Blueprint, render_template, request, jsonify, make_response
-from . import db
+from flask import Blueprint, render_template, request, jsonify, make_response, current_app, abort
+from jinja2 import Template
+from . import db, cache
 from .models import Project, Category, Goal
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from datetime import datetime
-import json
+from utils.timeline import (
+    get_timeline_items_for_dashboard,
+    get_timeline_items_for_project,
+    calculate_date_range,
+    filter_timeline_items,
+    prepare_gantt_data,
+    parse_date
+)
+import hashlib
+import orjson
 
 bp = Blueprint('main', __name__)
 
+# Cache key for the new project modal, which embeds the category list
+NEW_PROJECT_MODAL_CACHE_KEY = 'modal:new_project'
+
+# Constant HX-Trigger payloads, encoded once at import
+HX_TIMELINE_UPDATED = orjson.dumps({"timeline-updated": {}}).decode()
+HX_TIMELINE_AND_PROJECT = orjson.dumps({"timeline-updated": {}, "project-updated": {}}).decode()
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE support
+UPSERT_INSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+# Progress bar fragment for project_progress, compiled once at import and autoescaped
+PROGRESS_BAR_TEMPLATE = Template(
+    '<div class="progress-bar cat-{{ color }}" style="width: {{ progress }}%"></div>'
+    '<span class="progress-text-overlay">{{ progress }}%</span>',
+    autoescape=True
+)
+
+@bp.app_context_processor
+def inject_now():
+    # Resolve "now" once per render so every deadline on the page shares it
+    return {'now': datetime.utcnow()}
+
+def with_raiseload(*options):
+    """
+    Append a raiseload('*') safety net to explicit loader options when
+    SQLALCHEMY_RAISELOAD is enabled, so any relationship access that would
+    emit a lazy-load query raises instead of silently reintroducing N+1.
+    """
+    if current_app.config.get('SQLALCHEMY_RAISELOAD'):
+        return options + (raiseload('*', sql_only=True),)
+    return options
+
+def upsert_category(name, color):
+    """
+    Create the category, or update its color globally if it already exists
+    (User Requirement), in a single INSERT ... ON CONFLICT statement where the
+    dialect supports it. Returns the category id.
+    """
+    insert = UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if insert is not None:
+        stmt = insert(Category).values(name=name, color=color).on_conflict_do_update(
+            index_elements=[Category.name],
+            set_={'color': color, 'updated_at': datetime.utcnow()}
+        ).returning(Category.id)
+        return db.session.execute(stmt).scalar_one()
+    
+    # Other dialects: look the category up, then update or create it
+    category = Category.query.filter_by(name=name).first()
+    if category:
+        if category.color != color:
+            category.color = color
+    else:
+        category = Category(name=name, color=color)
+        db.session.add(category)
+        db.session.flush()  # Flush to get the ID
+    return category.id
+
+def get_project(project_id):
+    """
+    Fetch a project with its category and goals eager-loaded, or abort with 404.
+    Only worth using where they are read before a commit expires them.
+    """
+    return db.get_or_404(Project, project_id, options=[
+        joinedload(Project.category),
+        selectinload(Project.goals)
+    ])
+
+def progress_trigger(project_id):
+    """
+    Return the encoded HX-Trigger header that refreshes a project's progress
+    and the timeline after a goal change. Call it before commit: its aggregate
+    query flushes the pending change first, and nothing has expired yet.
+    """
+    completed, total = Project.count_goals([project_id]).get(project_id, (0, 0))
+    return orjson.dumps({
+        "updateProgress": {
+            "projectId": project_id,
+            "progress": Project.progress_percent(completed, total),
+            "goalCount": f"{completed}/{total}"
+        },
+        "timeline-updated": {}
+    }).decode()
+
 @bp.route('/')
 def index():
     # Fetch real projects from DB, ordered by their drag-and-drop index
-    # We join with Category to ensure we have the data
-    projects = Project.query.join(Category).order_by(Project.order_index).all()
+    # Category is eager-loaded so rendering the cards issues no extra queries
+    projects = Project.query.options(*with_raiseload(
+        joinedload(Project.category)
+    )).order_by(Project.order_index).all()
+    # Cards only show progress, so count goals in SQL instead of loading them
+    Project.load_goal_counts(projects)
     return render_template('index.html', projects=projects)
 
 @bp.route('/project/modal/new', methods=['GET'])
+@cache.cached(timeout=300, key_prefix=NEW_PROJECT_MODAL_CACHE_KEY)
 def new_project_modal():
     categories = Category.query.all()
     return render_template('components/modals/new_project.html', categories=categories)
@@ -22,27 +124,8 @@ def new_project_modal():
 def create_project():
     data = request.form
     
-    # Category Logic
-    cat_name = data.get('category_name')
-    cat_color = data.get('category_color', 'blue')
-    
-    # 1. Check if category exists
-    category = Category.query.filter_by(name=cat_name).first()
-    
-    if category:
-        # 2. Existing: Update color globally if changed (User Requirement)
-        if category.color != cat_color:
-            category.color = cat_color
-            # No commit yet, we do it at the end
-    else:
-        # 3. New: Create it
-        category = Category(name=cat_name, color=cat_color)
-        db.session.add(category)
-        db.session.flush() # Flush to get ID if needed
-    
-    # Calculate new order index
-    max_order = db.session.query(db.func.max(Project.order_index)).scalar()
-    new_order = (max_order or 0) + 1
+    # Category Logic: create it, or update its color if it exists
+    category_id = upsert_category(data.get('category_name'), data.get('category_color', 'blue'))
     
     # Parse optional deadline
     deadline = None
@@ -53,52 +136,57 @@ def create_project():
         except ValueError:
             pass  # Invalid date format, ignore
     
+    # Next order index; computed inside the INSERT itself where the dialect
+    # allows reading the table being inserted into (MySQL does not)
+    next_order = db.select(db.func.coalesce(db.func.max(Project.order_index), 0) + 1)
+    if db.session.get_bind().dialect.name in UPSERT_INSERTS:
+        new_order = next_order.scalar_subquery()
+    else:
+        new_order = db.session.execute(next_order).scalar()
+    
     new_project = Project(
         title=data.get('title'),
         description=data.get('description'),
-        category=category, # SQLAlchemy handles the relationshp
+        category_id=category_id,
         status='Active',
         order_index=new_order,
-        deadline=deadline
+        deadline=deadline,
+        # A new project has no goals; saves a query when the card renders
+        goals=[]
     )
     
     db.session.add(new_project)
+    db.session.flush()
+    
+    # Render the card before commit so the new project is not reloaded
+    # once commit expires it
+    response = make_response(render_template('components/project_card.html', project=new_project))
     db.session.commit()
+    # The new project modal lists categories and their colors
+    cache.delete(NEW_PROJECT_MODAL_CACHE_KEY)
     
     # Return the encoded card and trigger count update
-    response = make_response(render_template('components/project_card.html', project=new_project))
-    response.headers['HX-Trigger-After-Settle'] = json.dumps({"project-updated": {}, "timeline-updated": {}})
+    response.headers['HX-Trigger-After-Settle'] = HX_TIMELINE_AND_PROJECT
     return response
 
 @bp.route('/project/<int:project_id>/edit', methods=['GET'])
 def edit_project_modal(project_id):
-    project = Project.query.get_or_404(project_id)
+    project = db.get_or_404(Project, project_id)
     categories = Category.query.all()
     return render_template('components/modals/edit_project.html', project=project, categories=categories)
 
 @bp.route('/project/<int:project_id>/edit', methods=['POST'])
 def edit_project(project_id):
-    project = Project.query.get_or_404(project_id)
+    project = db.get_or_404(Project, project_id)
     data = request.form
     
     # Category Logic (same as create)
-    cat_name = data.get('category_name')
-    cat_color = data.get('category_color', 'blue')
-    
-    category = Category.query.filter_by(name=cat_name).first()
-    
-    if category:
-        if category.color != cat_color:
-            category.color = cat_color
-    else:
-        category = Category(name=cat_name, color=cat_color)
-        db.session.add(category)
-        db.session.flush()
+    category_id = upsert_category(data.get('category_name'), data.get('category_color', 'blue'))
         
     # Update Project Fields
     project.title = data.get('title')
     project.description = data.get('description')
-    project.category = category
+    project.category_id = category_id
     
     # Parse optional deadline
     deadline_str = data.get('deadline')
@@ -111,15 +199,16 @@ def edit_project(project_id):
         project.deadline = None
         
     db.session.commit()
+    cache.delete(NEW_PROJECT_MODAL_CACHE_KEY)
     
     # Return updated card and trigger timeline update
     response = make_response(render_template('components/project_card.html', project=project))
-    response.headers['HX-Trigger'] = json.dumps({"timeline-updated": {}})
+    response.headers['HX-Trigger'] = HX_TIMELINE_UPDATED
     return response
 
 @bp.route('/project/<int:project_id>', methods=['PATCH'])
 def update_project(project_id):
-    project = Project.query.get_or_404(project_id)
+    project = db.get_or_404(Project, project_id)
     
     # Update Status
     if 'status' in request.form:
@@ -144,22 +233,34 @@ def update_project(project_id):
     
     # Return updated card and trigger timeline update
     response = make_response(render_template('components/project_card.html', project=project))
-    response.headers['HX-Trigger'] = json.dumps({"timeline-updated": {}})
+    response.headers['HX-Trigger'] = HX_TIMELINE_UPDATED
     return response
 
 @bp.route('/project/<int:project_id>/delete/confirm', methods=['GET'])
 def delete_project_confirm(project_id):
-    project = Project.query.get_or_404(project_id)
+    project = db.get_or_404(Project, project_id)
     return render_template('components/modals/delete_project.html', project=project)
 
 @bp.route('/project/<int:project_id>', methods=['DELETE'])
 def delete_project(project_id):
-    project = Project.query.get_or_404(project_id)
-    db.session.delete(project)
+    # Delete with one statement per table instead of loading the project and
+    # cascading goal by goal. Goals go explicitly since foreign keys in
+    # existing databases have no ON DELETE CASCADE.
+    db.session.execute(
+        db.delete(Goal).where(Goal.project_id == project_id),
+        execution_options={'synchronize_session': False}
+    )
+    result = db.session.execute(
+        db.delete(Project).where(Project.id == project_id),
+        execution_options={'synchronize_session': False}
+    )
+    if result.rowcount == 0:
+        db.session.rollback()
+        abort(404)
     db.session.commit()
     
     response = make_response('')
-    response.headers['HX-Trigger-After-Settle'] = json.dumps({"timeline-updated": {}, "project-updated": {}})
+    response.headers['HX-Trigger-After-Settle'] = HX_TIMELINE_AND_PROJECT
     return response
 
 
@@ -168,11 +269,14 @@ def delete_project(project_id):
 # =====================
 @bp.route('/project/<int:project_id>/details', methods=['GET'])
 def project_details(project_id):
-    project = Project.query.get_or_404(project_id)
-    # Sort goals: Pending first, then Completed
-    # Python's sort is stable, and False < True. 
-    # status == 'Completed' will be True (1) for completed and False (0) for pending.
-    sorted_goals = sorted(project.goals, key=lambda g: g.status == 'Completed')
+    project = db.get_or_404(Project, project_id, options=[joinedload(Project.category)])
+    # Sort goals in SQL: Pending first, then Completed, each in creation order
+    sorted_goals = Goal.query.filter_by(project_id=project_id).order_by(
+        db.case((Goal.status == 'Completed', 1), else_=0),
+        Goal.id
+    ).all()
+    # The template also reads project.goals; hand it the same rows
+    set_committed_value(project, 'goals', sorted_goals)
     return render_template('components/modals/project_details.html', project=project, goals=sorted_goals)
 
 
@@ -181,7 +285,7 @@ def project_details(project_id):
 # ================
 @bp.route('/project/<int:project_id>/goal', methods=['POST'])
 def create_goal(project_id):
-    project = Project.query.get_or_404(project_id)
+    project = db.get_or_404(Project, project_id)
     title = request.form.get('title', '').strip()
     
     if not title:
@@ -203,89 +307,63 @@ def create_goal(project_id):
         deadline=deadline
     )
     db.session.add(goal)
-    db.session.commit()
-    
-    # Prepare progress data for trigger
-    completed = sum(1 for g in project.goals if g.status == 'Completed')
-    trigger_data = {
-        "updateProgress": {
-            "projectId": project.id,
-            "progress": project.calculate_progress(),
-            "goalCount": f"{completed}/{len(project.goals)}"
-        },
-        "timeline-updated": {}
-    }
     
+    # The trigger's query flushes the new goal, and rendering before commit
+    # means nothing is reloaded once commit expires it
+    trigger = progress_trigger(project.id)
     response = make_response(render_template('components/goal_item.html', goal=goal))
-    response.headers['HX-Trigger'] = json.dumps(trigger_data)
+    response.headers['HX-Trigger'] = trigger
+    db.session.commit()
     return response
 
 
 @bp.route('/goal/<int:goal_id>/toggle', methods=['POST'])
 def toggle_goal(goal_id):
-    goal = Goal.query.get_or_404(goal_id)
-    project = goal.project
-    
-    if goal.status == 'Pending':
-        goal.status = 'Completed'
-        goal.date_completed = datetime.utcnow()
-    else:
-        goal.status = 'Pending'
-        goal.date_completed = None
-    
-    db.session.commit()
-    
-    # Prepare progress data for trigger
-    completed = sum(1 for g in project.goals if g.status == 'Completed')
-    trigger_data = {
-        "updateProgress": {
-            "projectId": project.id,
-            "progress": project.calculate_progress(),
-            "goalCount": f"{completed}/{len(project.goals)}"
-        },
-        "timeline-updated": {}
-    }
+    # Flip the status in a single UPDATE ... RETURNING instead of SELECT + UPDATE;
+    # both CASEs read the status from before the update
+    is_pending = Goal.status == 'Pending'
+    goal = db.session.execute(
+        db.update(Goal)
+        .where(Goal.id == goal_id)
+        .values(
+            status=db.case((is_pending, 'Completed'), else_='Pending'),
+            date_completed=db.case((is_pending, datetime.utcnow()), else_=None)
+        )
+        .returning(Goal)
+    ).scalar_one_or_none()
+    if goal is None:
+        abort(404)
     
+    trigger = progress_trigger(goal.project_id)
     response = make_response(render_template('components/goal_item.html', goal=goal))
-    response.headers['HX-Trigger'] = json.dumps(trigger_data)
+    response.headers['HX-Trigger'] = trigger
+    db.session.commit()
     return response
 
 
 @bp.route('/goal/<int:goal_id>/delete/confirm', methods=['GET'])
 def delete_goal_confirm(goal_id):
-    goal = Goal.query.get_or_404(goal_id)
+    goal = db.get_or_404(Goal, goal_id)
     return render_template('components/modals/delete_goal.html', goal=goal)
 
 @bp.route('/goal/<int:goal_id>', methods=['DELETE'])
 def delete_goal(goal_id):
-    goal = Goal.query.get_or_404(goal_id)
-    project = goal.project
+    goal = db.get_or_404(Goal, goal_id)
     db.session.delete(goal)
-    db.session.commit()
-    
-    # Prepare progress data for trigger
-    completed = sum(1 for g in project.goals if g.status == 'Completed')
-    trigger_data = {
-        "updateProgress": {
-            "projectId": project.id,
-            "progress": project.calculate_progress(),
-            "goalCount": f"{completed}/{len(project.goals)}"
-        },
-        "timeline-updated": {}
-    }
     
     response = make_response('')
-    response.headers['HX-Trigger'] = json.dumps(trigger_data)
+    response.headers['HX-Trigger'] = progress_trigger(goal.project_id)
+    db.session.commit()
     return response
 
 @bp.route('/goal/<int:goal_id>/edit', methods=['GET'])
 def edit_goal_form(goal_id):
-    goal = Goal.query.get_or_404(goal_id)
+    goal = db.get_or_404(Goal, goal_id)
     return render_template('components/goal_edit_form.html', goal=goal)
 
 @bp.route('/goal/<int:goal_id>/edit', methods=['POST'])
 def edit_goal(goal_id):
-    goal = Goal.query.get_or_404(goal_id)
+    goal = db.get_or_404(Goal, goal_id)
     project = goal.project
     
     title = request.form.get('title', '').strip()
@@ -306,50 +384,61 @@ def edit_goal(goal_id):
         
     db.session.commit()
     
-    # Prepare progress trigger (timeline needs update too)
-    trigger_data = {
-        "timeline-updated": {}
-    }
-    
+    # Timeline needs an update too
     response = make_response(render_template('components/goal_item.html', goal=goal))
-    response.headers['HX-Trigger'] = json.dumps(trigger_data)
+    response.headers['HX-Trigger'] = HX_TIMELINE_UPDATED
     return response
 
 @bp.route('/goal/<int:goal_id>/cancel', methods=['GET'])
 def cancel_edit_goal(goal_id):
-    goal = Goal.query.get_or_404(goal_id)
+    goal = db.get_or_404(Goal, goal_id)
     return render_template('components/goal_item.html', goal=goal)
 
 
 @bp.route('/project/<int:project_id>/progress', methods=['GET'])
 def project_progress(project_id):
     """Return updated progress bar for a project"""
-    project = Project.query.get_or_404(project_id)
-    progress = project.calculate_progress()
-    color = project.category.color.lower()
-    return f'''
-        <div class="progress-bar cat-{color}" style="width: {progress}%"></div>
-        <span class="progress-text-overlay">{progress}%</span>
-    '''
+    project = get_project(project_id)
+    return PROGRESS_BAR_TEMPLATE.render(
+        color=project.category.color.lower(),
+        progress=project.calculate_progress()
+    )
 
 
 # =====================
 # Timeline API Routes
 # =====================
-from utils.timeline import (
-    get_timeline_items_for_dashboard,
-    get_timeline_items_for_project,
-    calculate_date_range,
-    filter_timeline_items,
-    prepare_gantt_data,
-    parse_date
-)
-
+def timeline_etag():
+    """
+    Build an ETag for the dashboard timeline from row counts and the latest
+    updated_at of every table it reads, in a single query. Active bars end
+    at the current time, so the current minute is part of the tag too.
+    """
+    columns = []
+    for model in (Category, Project, Goal):
+        columns.append(db.select(db.func.count()).select_from(model).scalar_subquery())
+        columns.append(db.select(db.func.max(model.updated_at)).scalar_subquery())
+    signature = tuple(db.session.execute(db.select(*columns)).one())
+    minute = datetime.utcnow().strftime('%Y-%m-%dT%H:%M')
+    return hashlib.md5(
+        repr((signature, request.query_string, minute)).encode(),
+        usedforsecurity=False
+    ).hexdigest()
 
 @bp.route('/api/timeline/dashboard', methods=['GET'])
 def timeline_dashboard():
     """Return Gantt timeline data for all projects and goals."""
-    projects = Project.query.join(Category).order_by(Project.order_index).all()
+    # Answer repeat polls with 304 until the data (or the minute) changes
+    etag = timeline_etag()
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    
+    projects = Project.query.options(*with_raiseload(
+        joinedload(Project.category),
+        selectinload(Project.goals)
+    )).order_by(Project.order_index).all()
     
     # Get all timeline items
     items = get_timeline_items_for_dashboard(projects)
@@ -360,8 +449,8 @@ def timeline_dashboard():
     date_start = request.args.get('start_date')
     date_end = request.args.get('end_date')
     
-    dt_start = parse_date(date_start)
-    dt_end = parse_date(date_end)
+    dt_start = parse_date(date_start) if date_start else None
+    dt_end = parse_date(date_end) if date_end else None
     
     if status_filter or type_filter or date_start or date_end:
         status_list = status_filter.split(',') if status_filter else None
@@ -379,13 +468,20 @@ def timeline_dashboard():
     date_range = calculate_date_range(items, explicit_range=explicit_range)
     gantt_data = prepare_gantt_data(items, date_range)
     
-    return jsonify(gantt_data)
+    response = jsonify(gantt_data)
+    response.set_etag(etag)
+    # Let the browser cache the payload but always revalidate it
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 
 @bp.route('/api/timeline/project/<int:project_id>', methods=['GET'])
 def timeline_project(project_id):
     """Return Gantt timeline data for a specific project's goals."""
-    project = Project.query.get_or_404(project_id)
+    project = Project.query.options(*with_raiseload(
+        joinedload(Project.category),
+        selectinload(Project.goals)
+    )).filter_by(id=project_id).first_or_404()
     
     # Get timeline items for this project
     items = get_timeline_items_for_project(project)
@@ -395,8 +491,8 @@ def timeline_project(project_id):
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    dt_start = parse_date(start_date)
-    dt_end = parse_date(end_date)
+    dt_start = parse_date(start_date) if start_date else None
+    dt_end = parse_date(end_date) if end_date else None
     
     if status_filter or start_date or end_date:
         status_list = status_filter.split(',') if status_filter else None
@@ -419,28 +515,38 @@ def timeline_project(project_id):
 @bp.route('/api/timeline/filter', methods=['GET'])
 def timeline_filter():
     """Advanced filtering endpoint supporting multiple filters."""
-    projects = Project.query.join(Category).order_by(Project.order_index).all()
+    project_id = request.args.get('project_id', type=int)
+    
+    query = Project.query.options(*with_raiseload(
+        joinedload(Project.category),
+        selectinload(Project.goals)
+    ))
+    # Narrow to a single project in SQL rather than filtering its items afterwards
+    if project_id is not None:
+        query = query.filter(Project.id == project_id)
+    projects = query.order_by(Project.order_index).all()
     items = get_timeline_items_for_dashboard(projects)
     
     # Parse all filter parameters
     status_filter = request.args.get('status')
     type_filter = request.args.get('type')
-    project_id = request.args.get('project_id', type=int)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     
-    status_list = status_filter.split(',') if status_filter else None
-    dt_start = parse_date(start_date)
-    dt_end = parse_date(end_date)
-    
-    items = filter_timeline_items(
-        items,
-        date_start=dt_start,
-        date_end=dt_end,
-        status=status_list,
-        project_id=project_id,
-        item_type=type_filter
-    )
+    dt_start = parse_date(start_date) if start_date else None
+    dt_end = parse_date(end_date) if end_date else None
+    
+    # Without filters every item is kept, so skip the filter pass
+    if status_filter or type_filter or start_date or end_date:
+        status_list = status_filter.split(',') if status_filter else None
+        
+        items = filter_timeline_items(
+            items,
+            date_start=dt_start,
+            date_end=dt_end,
+            status=status_list,
+            item_type=type_filter
+        )
     
     explicit_range = (dt_start, dt_end) if (dt_start and dt_end) else None
     date_range = calculate_date_range(items, explicit_range=explicit_range)